@@ -0,0 +1,150 @@
+"""
+Activity index - Time-ordered rollup buckets for users and items activity
+"""
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from typing import Dict, List, Optional
+
+
+class Granularity(str, Enum):
+    """Supported bucket sizes for activity rollups"""
+    HOUR = "hour"
+    DAY = "day"
+    WEEK = "week"
+
+
+def as_naive_utc(timestamp: datetime) -> datetime:
+    """Stored timestamps are naive UTC; align timezone-aware input with them."""
+    if timestamp.tzinfo is None:
+        return timestamp
+    return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def bucket_start(timestamp: datetime, granularity: Granularity) -> datetime:
+    """Truncate a timestamp to the start of the bucket that contains it."""
+    if granularity is Granularity.HOUR:
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    day = timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity is Granularity.DAY:
+        return day
+    return day - timedelta(days=day.weekday())
+
+
+def bucket_end(timestamp: datetime, granularity: Granularity) -> datetime:
+    """Round a timestamp up to the nearest bucket boundary."""
+    start = bucket_start(timestamp, granularity)
+    if start == timestamp:
+        return start
+    if granularity is Granularity.HOUR:
+        return start + timedelta(hours=1)
+    if granularity is Granularity.DAY:
+        return start + timedelta(days=1)
+    return start + timedelta(weeks=1)
+
+
+class ActivityBucket:
+    """Pre-aggregated counters for a single time bucket"""
+
+    __slots__ = (
+        "start",
+        "items_created",
+        "items_updated",
+        "items_deleted",
+        "value_created",
+        "users_created",
+        "users_updated",
+        "users_deleted",
+    )
+
+    def __init__(self, start: datetime):
+        self.start = start
+        self.items_created = 0
+        self.items_updated = 0
+        self.items_deleted = 0
+        self.value_created = 0.0
+        self.users_created = 0
+        self.users_updated = 0
+        self.users_deleted = 0
+
+
+class ActivityIndex:
+    """
+    Rollup buckets for every granularity, kept in time order.
+
+    Writes update one bucket per granularity, so reading a range costs
+    a binary search plus one step per bucket, independent of how many
+    users or items were created in it.
+    """
+
+    def __init__(self):
+        self._buckets: Dict[Granularity, Dict[datetime, ActivityBucket]] = {
+            granularity: {} for granularity in Granularity
+        }
+        self._starts: Dict[Granularity, List[datetime]] = {
+            granularity: [] for granularity in Granularity
+        }
+
+    def _touch(self, timestamp: datetime) -> List[ActivityBucket]:
+        """Return the buckets containing a timestamp, creating them if needed."""
+        touched = []
+        for granularity in Granularity:
+            start = bucket_start(timestamp, granularity)
+            buckets = self._buckets[granularity]
+            bucket = buckets.get(start)
+            if bucket is None:
+                bucket = buckets[start] = ActivityBucket(start)
+                insort(self._starts[granularity], start)
+            touched.append(bucket)
+        return touched
+
+    def record_item_created(self, created_at: datetime, price: float) -> None:
+        for bucket in self._touch(created_at):
+            bucket.items_created += 1
+            bucket.value_created += price
+
+    def record_item_updated(self, updated_at: datetime) -> None:
+        for bucket in self._touch(updated_at):
+            bucket.items_updated += 1
+
+    def record_item_deleted(self, deleted_at: datetime) -> None:
+        for bucket in self._touch(deleted_at):
+            bucket.items_deleted += 1
+
+    def record_user_created(self, created_at: datetime) -> None:
+        for bucket in self._touch(created_at):
+            bucket.users_created += 1
+
+    def record_user_updated(self, updated_at: datetime) -> None:
+        for bucket in self._touch(updated_at):
+            bucket.users_updated += 1
+
+    def record_user_deleted(self, deleted_at: datetime) -> None:
+        for bucket in self._touch(deleted_at):
+            bucket.users_deleted += 1
+
+    def range(
+        self,
+        granularity: Granularity,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> List[ActivityBucket]:
+        """
+        Get the non-empty buckets overlapping [start, end), oldest first.
+
+        A bucket is included when any part of it falls inside the range,
+        so the range effectively covers whole buckets, from `start` aligned
+        down to `end` aligned up (see bucket_start / bucket_end).
+        """
+        starts = self._starts[granularity]
+        lo = 0
+        hi = len(starts)
+        if start is not None:
+            lo = bisect_left(starts, bucket_start(as_naive_utc(start), granularity))
+        if end is not None:
+            hi = bisect_left(starts, as_naive_utc(end))
+        buckets = self._buckets[granularity]
+        return [buckets[key] for key in starts[lo:hi]]
+
+
+activity_index = ActivityIndex()
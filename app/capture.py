@@ -0,0 +1,311 @@
+"""
+Traffic capture - ASGI middleware recording sampled requests to NDJSON
+"""
+import atexit
+import base64
+import hashlib
+import json
+import logging
+import queue
+import random
+import secrets
+import time
+import zlib
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Callable, Iterable, Optional
+from urllib.parse import parse_qsl, urlencode
+
+# Personal data in the API's request and response bodies
+REDACT_FIELDS = ("email", "full_name", "user_email", "user_name")
+# Response fields that legitimately differ between a capture and its replay
+VOLATILE_FIELDS = ("created_at", "updated_at", "timestamp")
+# Methods whose requests are sampled; all others change state and are
+# always recorded, so a replay from empty state creates the same rows
+SAMPLED_METHODS = ("GET", "HEAD")
+
+
+def encode_body(body: bytes) -> dict:
+    """Encode a body for a JSON record: UTF-8 text when possible, base64 otherwise."""
+    try:
+        return {"body": body.decode("utf-8"), "body_encoding": "utf-8"}
+    except UnicodeDecodeError:
+        return {"body": base64.b64encode(body).decode("ascii"), "body_encoding": "base64"}
+
+
+def decode_body(body: Optional[str], encoding: Optional[str]) -> bytes:
+    """Inverse of encode_body."""
+    if not body:
+        return b""
+    if encoding == "base64":
+        return base64.b64decode(body)
+    return body.encode("utf-8")
+
+
+def strip_volatile(value):
+    """Drop fields that change on every run from a decoded JSON value."""
+    if isinstance(value, dict):
+        return {
+            key: strip_volatile(item)
+            for key, item in value.items()
+            if key not in VOLATILE_FIELDS
+        }
+    if isinstance(value, list):
+        return [strip_volatile(item) for item in value]
+    return value
+
+
+def stable_digest(value) -> str:
+    """SHA-256 of a decoded JSON value without its volatile fields."""
+    canonical = json.dumps(strip_volatile(value), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def decode_json(body: bytes, content_encoding: Optional[str] = None):
+    """Decode a possibly gzip/deflate encoded JSON body; raises ValueError if it is not JSON."""
+    if content_encoding in ("gzip", "deflate"):
+        try:
+            # 47 = 32 + 15: accept both gzip and zlib headers
+            body = zlib.decompress(body, 47)
+        except zlib.error as error:
+            raise ValueError(str(error)) from error
+    return json.loads(body)
+
+
+def redact_value(value, fields: frozenset, pseudonym: Callable[[str], str]):
+    """
+    Replace the values of `fields` anywhere in a decoded JSON value.
+
+    Strings become stable pseudonyms, so a redacted capture still replays
+    consistently (the same email maps to the same pseudonym in requests
+    and responses); other values become None.
+    """
+    if isinstance(value, dict):
+        return {
+            key: (pseudonym(item) if isinstance(item, str) else None)
+            if key in fields else redact_value(item, fields, pseudonym)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [redact_value(item, fields, pseudonym) for item in value]
+    return value
+
+
+class CaptureFormatter(logging.Formatter):
+    """
+    Turn captured exchanges into NDJSON lines, redacting them on the way.
+
+    Runs on the capture's background thread, so decoding and redacting
+    bodies never delays request handling.
+    """
+
+    def __init__(
+        self,
+        redact_fields: Iterable[str] = REDACT_FIELDS,
+        redact: Optional[Callable[[dict], Optional[dict]]] = None
+    ):
+        super().__init__()
+        self.redact_fields = frozenset(redact_fields)
+        self.redact = redact
+        # Per-process salt: pseudonyms are stable within a capture but
+        # cannot be matched against hashes of known values
+        self._salt = secrets.token_bytes(16)
+
+    def pseudonym(self, value: str) -> str:
+        digest = hashlib.sha256(self._salt + value.encode("utf-8")).hexdigest()[:16]
+        # Keep emails valid so replayed requests pass validation
+        return f"{digest}@redacted.example.com" if "@" in value else f"redacted-{digest}"
+
+    def _redact_body(self, body: bytes, content_encoding: Optional[str] = None) -> Optional[bytes]:
+        """Redacted, decoded copy of a JSON body, or None if it is not JSON."""
+        try:
+            value = decode_json(body, content_encoding)
+        except ValueError:
+            return None
+        value = redact_value(value, self.redact_fields, self.pseudonym)
+        return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+    def _stable_digest(self, body: bytes, content_encoding: Optional[str]) -> Optional[str]:
+        """Digest of a JSON body as redacted and without volatile fields, or None if it is not JSON."""
+        try:
+            value = decode_json(body, content_encoding)
+        except ValueError:
+            return None
+        if self.redact_fields:
+            value = redact_value(value, self.redact_fields, self.pseudonym)
+        return stable_digest(value)
+
+    def format(self, record: logging.LogRecord) -> str:
+        # RotatingFileHandler formats each record twice (rollover check and write)
+        line = getattr(record, "capture_line", None)
+        if line is None:
+            line = record.capture_line = self._format_exchange(dict(record.msg))
+        return line
+
+    def _format_exchange(self, exchange: dict) -> str:
+        request_body = exchange.pop("body", None)
+        response_body = exchange.pop("response_body", None)
+        large_response_body = exchange.pop("large_response_body", None)
+
+        if self.redact_fields:
+            if exchange["query"]:
+                exchange["query"] = urlencode([
+                    (name, self.pseudonym(value) if name in self.redact_fields else value)
+                    for name, value in parse_qsl(exchange["query"], keep_blank_values=True)
+                ])
+            if request_body:
+                request_body = self._redact_body(request_body) or request_body
+            if response_body:
+                redacted = self._redact_body(response_body, exchange["content_encoding"])
+                if redacted is not None:
+                    # Stored decoded, since it no longer matches the encoded bytes
+                    response_body = redacted
+                    exchange["response_body_redacted"] = True
+
+        if large_response_body is not None:
+            # Too large to store, but replays can still compare it by digest
+            digest = self._stable_digest(large_response_body, exchange["content_encoding"])
+            if digest is not None:
+                exchange["response_stable_sha256"] = digest
+
+        if request_body is not None:
+            exchange.update(encode_body(request_body))
+        if response_body is not None:
+            encoded = encode_body(response_body)
+            exchange["response_body"] = encoded["body"]
+            exchange["response_body_encoding"] = encoded["body_encoding"]
+        if self.redact is not None:
+            exchange = self.redact(exchange) or exchange
+        return json.dumps(exchange, separators=(",", ":"))
+
+
+class _RecordQueueHandler(QueueHandler):
+    """Queue records as they are, leaving formatting to the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class TrafficCaptureMiddleware:
+    """
+    Record a sample of HTTP requests and their responses, one JSON object
+    per line, to a size-rotated file.
+
+    Each record holds the method, path, query string, request body,
+    response status, response digest and the time spent in the app.
+    Only GET and HEAD requests are sampled at `sample_rate`; requests
+    that change state are always recorded, since a replay starts from an
+    empty store and must create the same rows.
+
+    Bodies larger than `max_body_bytes` are left out (the response digest
+    is always kept). JSON responses of up to `max_digest_bytes` that are
+    left out get a second digest, taken without volatile fields, that a
+    replay can compare. Lines are written by a background thread so
+    request handling never waits on disk.
+
+    Values of `redact_fields` in JSON bodies and query parameters are
+    replaced by pseudonyms before they are written; `redact`, if given,
+    is called last with each record and may change it or return a
+    replacement. The response digest is always over the original bytes.
+    """
+
+    def __init__(
+        self,
+        app,
+        path: str,
+        sample_rate: float = 1.0,
+        max_bytes: int = 50 * 1024 * 1024,
+        backup_count: int = 5,
+        max_body_bytes: int = 64 * 1024,
+        max_digest_bytes: int = 16 * 1024 * 1024,
+        redact_fields: Iterable[str] = REDACT_FIELDS,
+        redact: Optional[Callable[[dict], Optional[dict]]] = None
+    ):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.max_body_bytes = max_body_bytes
+        self.max_digest_bytes = max(max_digest_bytes, max_body_bytes)
+
+        handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count)
+        handler.setFormatter(CaptureFormatter(redact_fields, redact))
+        records: queue.Queue = queue.Queue(-1)
+        self._handler = handler
+        self._closed = False
+        self._listener = QueueListener(records, handler)
+        self._listener.start()
+        atexit.register(self.close)
+
+        self._logger = logging.getLogger(f"{__name__}.{path}")
+        self._logger.setLevel(logging.INFO)
+        self._logger.propagate = False
+        self._logger.addHandler(_RecordQueueHandler(records))
+
+    def close(self) -> None:
+        """Write out pending records and stop the writer thread."""
+        atexit.unregister(self.close)
+        if not self._closed:
+            self._closed = True
+            self._listener.stop()
+            self._handler.close()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (
+            scope["method"] in SAMPLED_METHODS and random.random() >= self.sample_rate
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.time()
+        started = time.perf_counter()
+        request_body = bytearray()
+        response_body = bytearray()
+        response_digest = hashlib.sha256()
+        response = {"status": None, "size": 0, "content_encoding": None}
+
+        async def capture_receive():
+            message = await receive()
+            if message["type"] == "http.request" and len(request_body) <= self.max_body_bytes:
+                request_body.extend(message.get("body", b""))
+            return message
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                for name, value in message.get("headers", []):
+                    if name.lower() == b"content-encoding":
+                        response["content_encoding"] = value.decode("latin-1")
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                response_digest.update(chunk)
+                response["size"] += len(chunk)
+                if len(response_body) <= self.max_digest_bytes:
+                    response_body.extend(chunk)
+            await send(message)
+
+        try:
+            await self.app(scope, capture_receive, capture_send)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            headers = dict(scope.get("headers") or [])
+            record = {
+                "ts": started_at,
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "content_type": headers.get(b"content-type", b"").decode("latin-1") or None,
+                "accept_encoding": headers.get(b"accept-encoding", b"").decode("latin-1") or None,
+                "status": response["status"],
+                "content_encoding": response["content_encoding"],
+                "duration_ms": round(duration_ms, 3),
+                "response_size": response["size"],
+                "response_sha256": response_digest.hexdigest(),
+            }
+            if len(request_body) <= self.max_body_bytes:
+                record["body"] = bytes(request_body)
+            else:
+                record["body_omitted"] = True
+            if len(response_body) <= self.max_body_bytes:
+                record["response_body"] = bytes(response_body)
+            elif len(response_body) <= self.max_digest_bytes:
+                record["large_response_body"] = bytes(response_body)
+            # Encoded and redacted by CaptureFormatter on the listener thread
+            self._logger.info(record)
@@ -0,0 +1,116 @@
+"""
+Change log - Bounded, sequence-numbered log of user and item mutations
+"""
+import asyncio
+import os
+import uuid
+from collections import deque
+from datetime import datetime
+from itertools import islice
+from typing import List, Optional, Set, Union
+
+from app.models import ChangeEntry, ItemResponse, UserResponse
+
+CHANGE_LOG_SIZE = int(os.getenv("CHANGE_LOG_SIZE", "10000"))
+
+
+class ResyncRequired(Exception):
+    """Raised when a client's position is no longer covered by the change log"""
+
+    def __init__(self, reason: str, epoch: str, latest_seq: int):
+        super().__init__(reason)
+        self.epoch = epoch
+        self.latest_seq = latest_seq
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class ChangeLog:
+    """
+    In-memory change log keeping the most recent `max_size` changes.
+
+    Sequence numbers start at 1 and have no gaps, so the position of a
+    change in the log is derived from its sequence number. They restart
+    whenever the log does (e.g. on a server restart), so every log also
+    gets a random epoch: a sequence number is only meaningful together
+    with the epoch it was read from.
+    """
+
+    def __init__(self, max_size: int = CHANGE_LOG_SIZE):
+        self._entries: deque = deque(maxlen=max_size)
+        self.epoch = uuid.uuid4().hex
+        self.latest_seq = 0
+        self._waiters: Set[asyncio.Future] = set()
+
+    @property
+    def oldest_seq(self) -> int:
+        """Sequence number of the oldest retained change."""
+        return self._entries[0].seq if self._entries else self.latest_seq + 1
+
+    def append(
+        self,
+        entity: str,
+        operation: str,
+        entity_id: int,
+        data: Optional[Union[UserResponse, ItemResponse]] = None
+    ) -> ChangeEntry:
+        """Record a change. Deletes are recorded as tombstones without data."""
+        self.latest_seq += 1
+        entry = ChangeEntry(
+            seq=self.latest_seq,
+            entity=entity,
+            operation=operation,
+            entity_id=entity_id,
+            timestamp=datetime.utcnow(),
+            data=data
+        )
+        self._entries.append(entry)
+        # Wake up long-polling readers, each on the event loop it waits in
+        for waiter in list(self._waiters):
+            loop = waiter.get_loop()
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(_wake, waiter)
+        return entry
+
+    def since(self, seq: int, limit: int, epoch: Optional[str] = None) -> List[ChangeEntry]:
+        """
+        Get up to `limit` changes with a sequence number greater than `seq`.
+
+        `epoch` is the epoch `seq` was read from; it may only be omitted
+        when starting from 0. Raises ResyncRequired if `seq` belongs to
+        another epoch, or if changes after it were already evicted.
+        """
+        if seq > 0 and epoch is None:
+            raise ResyncRequired("A sequence number requires its epoch", self.epoch, self.latest_seq)
+        if epoch is not None and epoch != self.epoch:
+            raise ResyncRequired(
+                f"Epoch {epoch} is not the current change log epoch", self.epoch, self.latest_seq
+            )
+        if seq < self.oldest_seq - 1 or seq > self.latest_seq:
+            raise ResyncRequired(
+                f"Changes after sequence {seq} are no longer available "
+                f"(retained: {self.oldest_seq}-{self.latest_seq})",
+                self.epoch,
+                self.latest_seq
+            )
+        start = seq - self.oldest_seq + 1
+        return list(islice(self._entries, start, start + limit))
+
+    async def wait(self, seq: int, timeout: float) -> None:
+        """Wait until a change after `seq` is recorded, or the timeout expires."""
+        if self.latest_seq > seq:
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self._waiters.discard(waiter)
+
+
+change_log = ChangeLog()
@@ -0,0 +1,235 @@
+"""
+Compression - Content-negotiated gzip/deflate responses with a report cache
+"""
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.changes import change_log
+
+# zlib window bits selecting the container format of each encoding
+WBITS = {"gzip": 31, "deflate": 15}
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick gzip or deflate from an Accept-Encoding header value.
+
+    The highest q-value wins; gzip is preferred on ties. Returns None
+    when neither is acceptable.
+    """
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding] = weight
+
+    best, best_weight = None, 0.0
+    for encoding in WBITS:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def compress(body: bytes, encoding: str, level: int) -> bytes:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, WBITS[encoding])
+    return compressor.compress(body) + compressor.flush()
+
+
+def compress_chunk(compressor, body: bytes, mode: int) -> bytes:
+    return compressor.compress(body) + compressor.flush(mode)
+
+
+class CachedResponse:
+    """A cached response body and its compressed variants"""
+
+    __slots__ = ("version", "status", "headers", "body", "compressed")
+
+    def __init__(self, version: int, status: int, headers: List[Tuple[bytes, bytes]], body: bytes):
+        self.version = version
+        self.status = status
+        self.headers = headers
+        self.body = body
+        # encoding -> compressed body, filled on first request for that encoding
+        self.compressed: Dict[str, bytes] = {}
+
+
+class ResponseCache:
+    """
+    LRU cache of responses tagged with the change log sequence number.
+
+    Any user or item mutation advances the sequence number, so an entry
+    is only served while the data it was computed from is unchanged.
+    """
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, bytes], CachedResponse]" = OrderedDict()
+
+    def get(self, key: Tuple[str, bytes]) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.version != change_log.latest_seq:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Tuple[str, bytes], entry: CachedResponse) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class CompressionMiddleware:
+    """
+    Compress responses of at least `minimum_size` bytes with gzip or
+    deflate, as negotiated from the request's Accept-Encoding header.
+
+    Streaming responses are compressed chunk by chunk. Successful GET
+    responses under `cache_prefixes` are cached together with their
+    compressed bytes, so repeated requests skip both the handler and
+    the compressor. Bodies and chunks of at least `threadpool_minimum_size`
+    bytes are compressed in the threadpool to keep the event loop free.
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        level: int = 6,
+        cache_prefixes: Tuple[str, ...] = (),
+        cache_entries: int = 32,
+        threadpool_minimum_size: int = 64 * 1024
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = level
+        self.threadpool_minimum_size = threadpool_minimum_size
+        self.cache_prefixes = cache_prefixes
+        self.cache = ResponseCache(cache_entries)
+
+    async def _run(self, size: int, function, *args):
+        """Call `function`, in the threadpool when `size` bytes are large enough to block."""
+        if size >= self.threadpool_minimum_size:
+            return await run_in_threadpool(function, *args)
+        return function(*args)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = None
+        for name, value in scope.get("headers") or []:
+            if name == b"accept-encoding":
+                encoding = negotiate_encoding(value.decode("latin-1"))
+                break
+
+        if scope["method"] == "GET" and scope["path"].startswith(self.cache_prefixes):
+            await self._cached(scope, receive, send, encoding)
+        elif encoding is None:
+            await self.app(scope, receive, send)
+        else:
+            await self._compressed(scope, receive, send, encoding)
+
+    async def _cached(self, scope, receive, send, encoding: Optional[str]) -> None:
+        key = (scope["path"], scope.get("query_string", b""))
+        entry = self.cache.get(key)
+
+        if entry is None:
+            version = change_log.latest_seq
+            start = {}
+            chunks = []
+
+            async def buffer_send(message):
+                if message["type"] == "http.response.start":
+                    start.update(message)
+                elif message["type"] == "http.response.body":
+                    chunks.append(message.get("body", b""))
+
+            await self.app(scope, receive, buffer_send)
+            entry = CachedResponse(version, start["status"], list(start.get("headers", [])), b"".join(chunks))
+            if entry.status == 200:
+                self.cache.put(key, entry)
+
+        body = entry.body
+        headers = [
+            (name, value) for name, value in entry.headers
+            if name.lower() != b"content-length"
+        ]
+        already_encoded = any(name.lower() == b"content-encoding" for name, _ in headers)
+        if len(body) >= self.minimum_size and not already_encoded:
+            headers.append((b"vary", b"Accept-Encoding"))
+            if encoding is not None:
+                compressed = entry.compressed.get(encoding)
+                if compressed is None:
+                    compressed = await self._run(len(body), compress, body, encoding, self.level)
+                    entry.compressed[encoding] = compressed
+                body = compressed
+                headers.append((b"content-encoding", encoding.encode()))
+        headers.append((b"content-length", str(len(body)).encode()))
+
+        await send({"type": "http.response.start", "status": entry.status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _compressed(self, scope, receive, send, encoding: str) -> None:
+        start = {}
+        compressor = None
+        passthrough = False
+
+        async def compress_send(message):
+            nonlocal compressor, passthrough
+
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk shows the response size
+                start.update(message)
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                headers = list(start.get("headers", []))
+                already_encoded = any(name.lower() == b"content-encoding" for name, _ in headers)
+                if already_encoded or (not more_body and len(body) < self.minimum_size):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+
+                headers = [(name, value) for name, value in headers if name.lower() != b"content-length"]
+                headers.append((b"content-encoding", encoding.encode()))
+                headers.append((b"vary", b"Accept-Encoding"))
+
+                if not more_body:
+                    body = await self._run(len(body), compress, body, encoding, self.level)
+                    headers.append((b"content-length", str(len(body)).encode()))
+                    await send({**start, "headers": headers})
+                    await send({"type": "http.response.body", "body": body})
+                    return
+
+                compressor = zlib.compressobj(self.level, zlib.DEFLATED, WBITS[encoding])
+                await send({**start, "headers": headers})
+
+            # Sync flush so clients can decode each chunk as it arrives
+            mode = zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH
+            chunk = await self._run(len(body), compress_chunk, compressor, body, mode)
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, compress_send)
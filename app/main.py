@@ -1,6 +1,19 @@
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import users, items, reports
+from app.capture import REDACT_FIELDS, TrafficCaptureMiddleware
+from app.compression import CompressionMiddleware
+from app.partitioning import shutdown_executor
+from app.routers import users, items, reports, changes
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # The report worker pool is started lazily by the first parallel report
+    shutdown_executor()
+
 
 app = FastAPI(
     title="API First Example",
@@ -8,7 +21,19 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    lifespan=lifespan
+)
+
+# Added first so it runs innermost: cached report responses must not
+# include per-request headers added by the outer middleware (e.g. CORS)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024")),
+    level=int(os.getenv("COMPRESSION_LEVEL", "6")),
+    cache_prefixes=("/api/v1/reports/",),
+    cache_entries=int(os.getenv("REPORT_CACHE_ENTRIES", "32")),
+    threadpool_minimum_size=int(os.getenv("COMPRESSION_THREADPOOL_MINIMUM_SIZE", "65536")),
 )
 
 app.add_middleware(
@@ -19,9 +44,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if os.getenv("TRAFFIC_CAPTURE_PATH"):
+    app.add_middleware(
+        TrafficCaptureMiddleware,
+        path=os.environ["TRAFFIC_CAPTURE_PATH"],
+        sample_rate=float(os.getenv("TRAFFIC_CAPTURE_SAMPLE_RATE", "1.0")),
+        max_bytes=int(os.getenv("TRAFFIC_CAPTURE_MAX_BYTES", str(50 * 1024 * 1024))),
+        backup_count=int(os.getenv("TRAFFIC_CAPTURE_BACKUPS", "5")),
+        redact_fields=[
+            field.strip()
+            for field in os.getenv("TRAFFIC_CAPTURE_REDACT_FIELDS", ",".join(REDACT_FIELDS)).split(",")
+            if field.strip()
+        ],
+    )
+
 app.include_router(users.router, prefix="/api/v1/users", tags=["Users"])
 app.include_router(items.router, prefix="/api/v1/items", tags=["Items"])
 app.include_router(reports.router, prefix="/api/v1/reports", tags=["Reports"])
+app.include_router(changes.router, prefix="/api/v1/changes", tags=["Changes"])
 
 
 @app.get("/")
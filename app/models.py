@@ -1,6 +1,7 @@
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Union
 from pydantic import BaseModel, EmailStr, Field
+from app.activity import Granularity
 
 
 # User Models
@@ -108,7 +109,8 @@ class ItemsStatistics(BaseModel):
 class ItemsSummaryResponse(BaseModel):
     """Response model for items summary report"""
     statistics: ItemsStatistics = Field(..., description="Overall statistics")
-    items: List[ItemWithOwner] = Field(..., description="List of items with owners")
+    items: List[ItemWithOwner] = Field(..., description="Requested page of items with owners")
+    has_more: bool = Field(..., description="Whether more items are available after this page")
 
 
 class UserReportStatistics(BaseModel):
@@ -162,5 +164,60 @@ class ItemsByPriceRangeResponse(BaseModel):
     """Response model for items by price range report"""
     filters: PriceRangeFilters = Field(..., description="Applied filters")
     total_items: int = Field(..., description="Total number of items matching filters")
-    items: List[ItemWithOwner] = Field(..., description="List of items with owners")
-
+    items: List[ItemWithOwner] = Field(..., description="Requested page of matching items with owners")
+    has_more: bool = Field(..., description="Whether more matching items are available after this page")
+
+
+# Activity Report Models
+class ActivityBucketStats(BaseModel):
+    """Activity counters for a single time bucket"""
+    bucket_start: datetime = Field(..., description="Start of the time bucket (UTC)")
+    items_created: int = Field(..., description="Number of items created in the bucket")
+    items_updated: int = Field(..., description="Number of item updates in the bucket")
+    items_deleted: int = Field(..., description="Number of items deleted in the bucket")
+    value_created: float = Field(..., description="Total price of items created in the bucket")
+    users_created: int = Field(..., description="Number of users created in the bucket")
+    users_updated: int = Field(..., description="Number of user updates in the bucket")
+    users_deleted: int = Field(..., description="Number of users deleted in the bucket")
+
+
+class ActivityTotals(BaseModel):
+    """Activity totals across all returned buckets"""
+    items_created: int = Field(..., description="Total number of items created")
+    value_created: float = Field(..., description="Total price of items created")
+    users_created: int = Field(..., description="Total number of users created")
+
+
+class ActivityReportResponse(BaseModel):
+    """Response model for activity report"""
+    granularity: Granularity = Field(..., description="Bucket granularity (hour, day or week)")
+    start: Optional[datetime] = Field(
+        None, description="Start of the covered range (inclusive), aligned down to a bucket boundary"
+    )
+    end: Optional[datetime] = Field(
+        None, description="End of the covered range (exclusive), aligned up to a bucket boundary"
+    )
+    totals: ActivityTotals = Field(..., description="Totals across all returned buckets")
+    buckets: List[ActivityBucketStats] = Field(..., description="Non-empty buckets, oldest first")
+
+
+# Change Feed Models
+class ChangeEntry(BaseModel):
+    """A single change in the change feed"""
+    seq: int = Field(..., description="Sequence number of the change")
+    entity: str = Field(..., description="Changed entity type (user or item)")
+    operation: str = Field(..., description="Change operation (create, update or delete)")
+    entity_id: int = Field(..., description="ID of the changed entity")
+    timestamp: datetime = Field(..., description="Change timestamp")
+    data: Optional[Union[UserResponse, ItemResponse]] = Field(
+        None, description="Entity state after the change (null for deletes)"
+    )
+
+
+class ChangesResponse(BaseModel):
+    """Response model for the change feed"""
+    epoch: str = Field(..., description="Change log epoch; sequence numbers are only valid within it")
+    changes: List[ChangeEntry] = Field(..., description="Changes after the requested sequence number")
+    next_since: int = Field(..., description="Sequence number to pass as since in the next request")
+    latest_seq: int = Field(..., description="Latest sequence number in the change log")
+    has_more: bool = Field(..., description="Whether more changes are available after this page")
@@ -0,0 +1,318 @@
+"""
+Partitioning - Hash-partitioned item store with scatter-gather aggregation
+"""
+import asyncio
+import os
+from array import array
+from collections.abc import MutableMapping, ValuesView
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.records import ItemRecord
+
+ITEMS_PARTITIONS = int(os.getenv("ITEMS_PARTITIONS", "1"))
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "0"))
+# Below this many items, shipping shards to worker processes costs more than
+# scanning them in-process.
+PARALLEL_MIN_ITEMS = int(os.getenv("REPORT_PARALLEL_MIN_ITEMS", "100000"))
+
+
+class ItemPartition:
+    """
+    A single shard of items.
+
+    The shard owns the running aggregates of its items (count, total
+    value and per-owner count and value), updated on every write, so
+    reports only scan a shard for what cannot be kept incrementally:
+    min/max prices and filters.
+
+    Stored records must not be modified in place: aggregates are undone
+    from the previous record, so updates put a modified copy.
+    """
+
+    def __init__(self):
+        self.rows: Dict[int, ItemRecord] = {}
+        self.total = 0.0
+        # owner_id -> [item count, total value]
+        self.per_owner: Dict[int, List] = {}
+
+    def _count(self, owner_id: int, price: float, sign: int) -> None:
+        owner = self.per_owner.setdefault(owner_id, [0, 0.0])
+        owner[0] += sign
+        owner[1] += sign * price
+        self.total += sign * price
+        if owner[0] == 0:
+            del self.per_owner[owner_id]
+        if not self.rows:
+            # Reset accumulated float error whenever the shard empties
+            self.total = 0.0
+
+    def put(self, item_id: int, item: ItemRecord) -> None:
+        previous = self.rows.get(item_id)
+        if previous is not None:
+            self._count(previous.owner_id, previous.price, -1)
+        self.rows[item_id] = item
+        self._count(item.owner_id, item.price, 1)
+
+    def remove(self, item_id: int) -> None:
+        item = self.rows.pop(item_id)
+        self._count(item.owner_id, item.price, -1)
+
+    def prices(self) -> array:
+        """
+        Snapshot of the shard's prices as a flat buffer, in row order.
+
+        Worker processes get flat buffers instead of the rows, which
+        would pickle every record.
+        """
+        return array("d", [item.price for item in self.rows.values()])
+
+    def columns(self) -> Tuple[array, array]:
+        """Snapshot of the shard's item IDs and prices, in row order."""
+        return array("q", self.rows), self.prices()
+
+    def items_of(self, owner_id: int) -> List[ItemRecord]:
+        return [item for item in self.rows.values() if item.owner_id == owner_id]
+
+
+class ItemValuesView(ValuesView):
+    """Values view iterating shards directly instead of through __getitem__"""
+
+    def __iter__(self) -> Iterator[ItemRecord]:
+        store = self._mapping
+        if store._locator is None:
+            yield from store.partitions[0].rows.values()
+            return
+        rows = [partition.rows for partition in store.partitions]
+        for item_id, index in store._locator.items():
+            yield rows[index][item_id]
+
+
+class PartitionedItemStore(MutableMapping):
+    """
+    Dict-like item store that partitions items into shards by owner_id.
+
+    All items of an owner live in the same shard, so per-owner aggregates
+    kept by different shards never overlap and merge by simple union.
+    Iteration follows insertion order, like a plain dict.
+
+    With several shards, a locator maps item IDs to their shard (and
+    keeps the global insertion order); a single shard needs none.
+    """
+
+    def __init__(self, partitions: int = 1):
+        if partitions < 1:
+            raise ValueError("partitions must be at least 1")
+        self.partitions: List[ItemPartition] = [ItemPartition() for _ in range(partitions)]
+        self._locator: Optional[Dict[int, int]] = {} if partitions > 1 else None
+
+    def partition_for(self, owner_id: int) -> int:
+        return hash(owner_id) % len(self.partitions)
+
+    def items_of(self, owner_id: int) -> List[ItemRecord]:
+        """
+        Items of one owner, read from its shard only.
+
+        In insertion order, except that an item moved from another owner
+        comes after the items that were already in the shard.
+        """
+        return self.partitions[self.partition_for(owner_id)].items_of(owner_id)
+
+    def group_by_owner(self) -> Dict[int, List[ItemRecord]]:
+        """Items grouped by owner, each group in insertion order."""
+        groups: Dict[int, List[ItemRecord]] = {}
+        for partition in self.partitions:
+            for item in partition.rows.values():
+                groups.setdefault(item.owner_id, []).append(item)
+        return groups
+
+    def __getitem__(self, item_id: int) -> ItemRecord:
+        if self._locator is None:
+            return self.partitions[0].rows[item_id]
+        return self.partitions[self._locator[item_id]].rows[item_id]
+
+    def __setitem__(self, item_id: int, item: ItemRecord) -> None:
+        if self._locator is None:
+            self.partitions[0].put(item_id, item)
+            return
+        target = self.partition_for(item.owner_id)
+        current = self._locator.get(item_id)
+        if current is not None and current != target:
+            self.partitions[current].remove(item_id)
+        self.partitions[target].put(item_id, item)
+        self._locator[item_id] = target
+
+    def __delitem__(self, item_id: int) -> None:
+        if self._locator is None:
+            self.partitions[0].remove(item_id)
+            return
+        self.partitions[self._locator.pop(item_id)].remove(item_id)
+
+    def __iter__(self) -> Iterator[int]:
+        if self._locator is None:
+            return iter(self.partitions[0].rows)
+        return iter(self._locator)
+
+    def __len__(self) -> int:
+        if self._locator is None:
+            return len(self.partitions[0].rows)
+        return len(self._locator)
+
+    def __contains__(self, item_id) -> bool:
+        if self._locator is None:
+            return item_id in self.partitions[0].rows
+        return item_id in self._locator
+
+    def values(self) -> ItemValuesView:
+        return ItemValuesView(self)
+
+
+class PartialAggregate:
+    """Aggregates over a set of items, mergeable across shards"""
+
+    __slots__ = ("count", "total", "min_price", "max_price", "per_owner")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min_price: Optional[float] = None
+        self.max_price: Optional[float] = None
+        # owner_id -> (item count, total value)
+        self.per_owner: Dict[int, Tuple[int, float]] = {}
+
+
+def price_bounds(prices: array) -> Tuple[Optional[float], Optional[float]]:
+    """Min and max of a shard's prices. Runs inside worker processes."""
+    if not prices:
+        return None, None
+    return min(prices), max(prices)
+
+
+def select_price_range(
+    item_ids: array,
+    prices: array,
+    min_price: Optional[float],
+    max_price: Optional[float]
+) -> List[int]:
+    """IDs of a shard's items priced within [min_price, max_price]. Runs inside worker processes."""
+    low = float("-inf") if min_price is None else min_price
+    high = float("inf") if max_price is None else max_price
+    return [item_id for item_id, price in zip(item_ids, prices) if low <= price <= high]
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_executor() -> Optional[ProcessPoolExecutor]:
+    """Get the shared report worker pool, or None when running in-process."""
+    global _executor
+
+    if REPORT_WORKERS <= 1:
+        return None
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=REPORT_WORKERS)
+    return _executor
+
+
+def shutdown_executor() -> None:
+    """Shut down the report worker pool, if it was started."""
+    global _executor
+
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+
+
+async def scatter_gather(
+    store: PartitionedItemStore,
+    task: Callable,
+    arguments: Callable[[ItemPartition], tuple],
+    executor: Optional[ProcessPoolExecutor] = None,
+    min_parallel_items: Optional[int] = None
+) -> list:
+    """
+    Run `task(*arguments(partition))` for every shard and return the
+    per-shard results in shard order.
+
+    Shards are processed in parallel on the worker pool when there is
+    more than one and the store is large enough; otherwise in-process.
+    `arguments` is always called on the event loop thread, so it sees
+    each shard in a consistent state.
+    """
+    if executor is None:
+        executor = get_executor()
+    if min_parallel_items is None:
+        min_parallel_items = PARALLEL_MIN_ITEMS
+
+    if executor is None or len(store.partitions) == 1 or len(store) < min_parallel_items:
+        return [task(*arguments(partition)) for partition in store.partitions]
+
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(*(
+        loop.run_in_executor(executor, task, *arguments(partition))
+        for partition in store.partitions
+    ))
+
+
+def merge_totals(store: PartitionedItemStore) -> PartialAggregate:
+    """
+    Merge the shards' running aggregates: count, total and per-owner totals.
+
+    Scans nothing; min_price and max_price are left as None.
+    """
+    merged = PartialAggregate()
+    for partition in store.partitions:
+        merged.count += len(partition.rows)
+        merged.total += partition.total
+        for owner_id, (count, total) in partition.per_owner.items():
+            merged.per_owner[owner_id] = (count, total)
+    return merged
+
+
+def merge_partials(store: PartitionedItemStore, bounds: Iterable[tuple]) -> PartialAggregate:
+    """Merge the shards' running aggregates with their scanned price bounds."""
+    merged = merge_totals(store)
+    for min_price, max_price in bounds:
+        if min_price is not None and (merged.min_price is None or min_price < merged.min_price):
+            merged.min_price = min_price
+        if max_price is not None and (merged.max_price is None or max_price > merged.max_price):
+            merged.max_price = max_price
+    return merged
+
+
+async def aggregate_items(
+    store: PartitionedItemStore,
+    executor: Optional[ProcessPoolExecutor] = None,
+    min_parallel_items: Optional[int] = None
+) -> PartialAggregate:
+    """Count, total, min/max price and per-owner totals over all items."""
+    bounds = await scatter_gather(
+        store, price_bounds, lambda partition: (partition.prices(),),
+        executor, min_parallel_items
+    )
+    return merge_partials(store, bounds)
+
+
+async def items_in_price_range(
+    store: PartitionedItemStore,
+    min_price: Optional[float],
+    max_price: Optional[float],
+    executor: Optional[ProcessPoolExecutor] = None,
+    min_parallel_items: Optional[int] = None
+) -> List[ItemRecord]:
+    """Items priced within [min_price, max_price], in insertion order."""
+    selected = await scatter_gather(
+        store,
+        select_price_range,
+        lambda partition: (*partition.columns(), min_price, max_price),
+        executor,
+        min_parallel_items
+    )
+    # IDs are assigned in insertion order, and the shards are merged by ID
+    item_ids = sorted(item_id for shard_ids in selected for item_id in shard_ids)
+    return [store[item_id] for item_id in item_ids if item_id in store]
+
+
+def create_item_store() -> PartitionedItemStore:
+    """Create the item store with ITEMS_PARTITIONS shards."""
+    return PartitionedItemStore(max(ITEMS_PARTITIONS, 1))
@@ -0,0 +1,120 @@
+"""
+Records - Compact in-memory storage rows for users and items
+"""
+import sys
+from datetime import datetime, timedelta
+from typing import Optional
+
+from app.models import ItemResponse, UserResponse
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def to_epoch_us(timestamp: datetime) -> int:
+    """Convert a naive UTC datetime to integer microseconds since the epoch."""
+    return (timestamp - EPOCH) // timedelta(microseconds=1)
+
+
+def from_epoch_us(epoch_us: int) -> datetime:
+    """Convert integer microseconds since the epoch to a naive UTC datetime."""
+    return EPOCH + timedelta(microseconds=epoch_us)
+
+
+# Only short strings (titles, short labels) repeat often enough to be worth
+# interning; long free text is mostly unique and would only grow the table.
+INTERN_MAX_LENGTH = 64
+
+
+def _shared(value: Optional[str]) -> Optional[str]:
+    """Share one string object between all rows holding the same short text."""
+    if value is not None and len(value) <= INTERN_MAX_LENGTH:
+        return sys.intern(value)
+    return value
+
+
+class UserRecord:
+    """
+    Stored user row.
+
+    Uses __slots__ instead of a per-row dict and keeps timestamps as
+    epoch microseconds; converted to UserResponse only when returned.
+    """
+
+    __slots__ = ("id", "email", "full_name", "created_at", "updated_at")
+
+    def __init__(
+        self,
+        id: int,
+        email: str,
+        full_name: str,
+        created_at: int,
+        updated_at: Optional[int] = None
+    ):
+        self.id = id
+        self.email = email
+        self.full_name = full_name
+        self.created_at = created_at
+        self.updated_at = updated_at
+
+    def to_response(self) -> UserResponse:
+        return UserResponse(
+            id=self.id,
+            email=self.email,
+            full_name=self.full_name,
+            created_at=from_epoch_us(self.created_at),
+            updated_at=from_epoch_us(self.updated_at) if self.updated_at is not None else None
+        )
+
+
+class ItemRecord:
+    """
+    Stored item row.
+
+    Uses __slots__ instead of a per-row dict, keeps timestamps as epoch
+    microseconds and shares repeated short titles and descriptions
+    between rows; converted to ItemResponse only when returned.
+    """
+
+    __slots__ = ("id", "title", "description", "price", "owner_id", "created_at", "updated_at")
+
+    def __init__(
+        self,
+        id: int,
+        title: str,
+        description: Optional[str],
+        price: float,
+        owner_id: int,
+        created_at: int,
+        updated_at: Optional[int] = None
+    ):
+        self.id = id
+        self.title = _shared(title)
+        self.description = _shared(description)
+        self.price = price
+        self.owner_id = owner_id
+        self.created_at = created_at
+        self.updated_at = updated_at
+
+    def copy(self) -> "ItemRecord":
+        """Shallow copy, to modify a stored item without touching the stored row."""
+        return ItemRecord(
+            self.id, self.title, self.description, self.price,
+            self.owner_id, self.created_at, self.updated_at
+        )
+
+    def set_title(self, title: str) -> None:
+        self.title = _shared(title)
+
+    def set_description(self, description: Optional[str]) -> None:
+        self.description = _shared(description)
+
+    def to_response(self) -> ItemResponse:
+        return ItemResponse(
+            id=self.id,
+            title=self.title,
+            description=self.description,
+            price=self.price,
+            owner_id=self.owner_id,
+            created_at=from_epoch_us(self.created_at),
+            updated_at=from_epoch_us(self.updated_at) if self.updated_at is not None else None
+        )
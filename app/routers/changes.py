@@ -0,0 +1,69 @@
+"""
+Changes router - Change feed for incremental client sync
+"""
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, status
+from app.changes import ResyncRequired, change_log
+from app.models import ChangesResponse, ErrorResponse
+
+router = APIRouter()
+
+
+@router.get(
+    "",
+    response_model=ChangesResponse,
+    summary="Get changes",
+    description="Retrieves user and item changes after a given sequence number",
+    responses={
+        status.HTTP_410_GONE: {
+            "model": ErrorResponse,
+            "description": "Requested changes are no longer retained; a full resync is required"
+        }
+    }
+)
+async def get_changes(
+    since: int = Query(0, ge=0),
+    epoch: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    wait: float = Query(0, ge=0, le=30)
+) -> ChangesResponse:
+    """
+    Get changes after a sequence number.
+
+    - **since**: Sequence number of the last change already applied (default: 0)
+    - **epoch**: Change log epoch `since` was read from (required when since > 0)
+    - **limit**: Maximum number of changes to return (default: 100)
+    - **wait**: Seconds to wait for new changes when there are none (long-poll, default: 0)
+
+    Deletes are returned as tombstones without data. Sequence numbers
+    restart with every change log epoch (e.g. after a server restart). If
+    the epoch does not match, or the changes after `since` are no longer
+    retained, responds with 410: the client must note the current epoch
+    and latest sequence number, re-download users and items, and continue
+    from that position.
+    """
+    try:
+        changes = change_log.since(since, limit, epoch)
+        if not changes and wait > 0:
+            await change_log.wait(since, wait)
+            changes = change_log.since(since, limit, epoch)
+    except ResyncRequired as exc:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail=f"Resync required: {exc}",
+            headers={
+                "X-Resync-Required": "true",
+                "X-Change-Log-Epoch": exc.epoch,
+                "X-Latest-Seq": str(exc.latest_seq)
+            }
+        )
+
+    next_since = changes[-1].seq if changes else since
+
+    return ChangesResponse(
+        epoch=change_log.epoch,
+        changes=changes,
+        next_since=next_since,
+        latest_seq=change_log.latest_seq,
+        has_more=next_since < change_log.latest_seq
+    )
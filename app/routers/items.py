@@ -2,10 +2,14 @@ from typing import List
 from fastapi import APIRouter, HTTPException, status
 from datetime import datetime
 from app.models import ItemCreate, ItemUpdate, ItemResponse
+from app.activity import activity_index
+from app.changes import change_log
+from app.partitioning import create_item_store
+from app.records import ItemRecord, to_epoch_us
 
 router = APIRouter()
 
-items_db = {}
+items_db = create_item_store()
 item_id_counter = 1
 
 
@@ -28,19 +32,22 @@ async def create_item(item: ItemCreate, owner_id: int) -> ItemResponse:
     global item_id_counter
 
     now = datetime.utcnow()
-    new_item = {
-        "id": item_id_counter,
-        "title": item.title,
-        "description": item.description,
-        "price": item.price,
-        "owner_id": owner_id,
-        "created_at": now,
-        "updated_at": None,
-    }
+    new_item = ItemRecord(
+        id=item_id_counter,
+        title=item.title,
+        description=item.description,
+        price=item.price,
+        owner_id=owner_id,
+        created_at=to_epoch_us(now),
+    )
     items_db[item_id_counter] = new_item
     item_id_counter += 1
+    activity_index.record_item_created(now, item.price)
 
-    return ItemResponse(**new_item)
+    created = new_item.to_response()
+    change_log.append("item", "create", created.id, created)
+
+    return created
 
 
 @router.get(
@@ -59,7 +66,7 @@ async def get_items(skip: int = 0, limit: int = 100) -> List[ItemResponse]:
     Returns a list of all items with pagination support.
     """
     items_list = list(items_db.values())[skip : skip + limit]
-    return [ItemResponse(**item) for item in items_list]
+    return [item.to_response() for item in items_list]
 
 
 @router.get(
@@ -82,16 +89,13 @@ async def get_items_by_user(
 
     Returns a list of items owned by the specified user with pagination support.
     """
-    # Filter items by owner_id
-    user_items = [
-        item for item in items_db.values()
-        if item["owner_id"] == user_id
-    ]
+    # Only the user's shard holds their items
+    user_items = items_db.items_of(user_id)
     
     # Apply pagination
     user_items = user_items[skip : skip + limit]
     
-    return [ItemResponse(**item) for item in user_items]
+    return [item.to_response() for item in user_items]
 
 
 @router.get(
@@ -112,7 +116,7 @@ async def get_item(item_id: int) -> ItemResponse:
             detail=f"Item with ID {item_id} not found",
         )
 
-    return ItemResponse(**items_db[item_id])
+    return items_db[item_id].to_response()
 
 
 @router.put(
@@ -136,18 +140,25 @@ async def update_item(item_id: int, item_update: ItemUpdate) -> ItemResponse:
             detail=f"Item with ID {item_id} not found",
         )
 
-    item = items_db[item_id]
+    # Store a modified copy: the store undoes its aggregates from the old row
+    item = items_db[item_id].copy()
 
     if item_update.title is not None:
-        item["title"] = item_update.title
+        item.set_title(item_update.title)
     if item_update.description is not None:
-        item["description"] = item_update.description
+        item.set_description(item_update.description)
     if item_update.price is not None:
-        item["price"] = item_update.price
+        item.price = item_update.price
+
+    now = datetime.utcnow()
+    item.updated_at = to_epoch_us(now)
+    items_db[item_id] = item
+    activity_index.record_item_updated(now)
 
-    item["updated_at"] = datetime.utcnow()
+    updated = item.to_response()
+    change_log.append("item", "update", item_id, updated)
 
-    return ItemResponse(**item)
+    return updated
 
 
 @router.delete(
@@ -169,4 +180,6 @@ async def delete_item(item_id: int):
         )
 
     del items_db[item_id]
+    activity_index.record_item_deleted(datetime.utcnow())
+    change_log.append("item", "delete", item_id)
     return None
@@ -1,6 +1,8 @@
 """
 Reports router - Generates reports using internal APIs
 """
+import heapq
+from datetime import datetime
 from typing import List, Optional
 from fastapi import APIRouter, HTTPException, status
 from app.models import (
@@ -16,8 +18,13 @@ from app.models import (
     SystemOverviewStats,
     UserStats,
     ItemsByPriceRangeResponse,
-    PriceRangeFilters
+    PriceRangeFilters,
+    ActivityReportResponse,
+    ActivityBucketStats,
+    ActivityTotals
 )
+from app.activity import Granularity, activity_index, as_naive_utc, bucket_end, bucket_start
+from app.partitioning import aggregate_items, items_in_price_range, merge_totals
 from app.routers import users, items
 
 router = APIRouter()
@@ -40,14 +47,14 @@ async def get_users_summary() -> UsersSummaryResponse:
     """
     users_list = await users.get_users()
     
-    items_list = await items.get_items()
+    items_by_owner = items.items_db.group_by_owner()
+    aggregate = merge_totals(items.items_db)
     
     summary = []
     for user in users_list:
-        user_items = [item for item in items_list if item.owner_id == user.id]
+        user_items = [item.to_response() for item in items_by_owner.get(user.id, [])]
         
-        total_items = len(user_items)
-        total_value = sum(item.price for item in user_items)
+        total_items, total_value = aggregate.per_owner.get(user.id, (0, 0.0))
         avg_price = total_value / total_items if total_items > 0 else 0.0
         
         summary.append(
@@ -74,17 +81,19 @@ async def get_users_summary() -> UsersSummaryResponse:
     summary="Items summary report",
     description="Generates a summary report of all items with owner information"
 )
-async def get_items_summary() -> ItemsSummaryResponse:
+async def get_items_summary(skip: int = 0, limit: int = 100) -> ItemsSummaryResponse:
     """
     Get items summary report.
     
-    Returns a report with all items and their owner information:
+    - **skip**: Number of items to skip (for pagination)
+    - **limit**: Maximum number of items to return (default: 100)
+    
+    Returns a report with a page of items and their owner information:
     - Item details
     - Owner information
-    - Overall statistics
+    - Overall statistics, over all items
     """
-    items_list = await items.get_items()
-    
+    items_list = await items.get_items(skip, limit)
 
     users_list = await users.get_users()
     
@@ -100,11 +109,13 @@ async def get_items_summary() -> ItemsSummaryResponse:
             )
         )
     
-    total_items = len(items_list)
-    total_value = sum(item.price for item in items_list)
+    aggregate = await aggregate_items(items.items_db)
+    
+    total_items = aggregate.count
+    total_value = aggregate.total
     avg_price = total_value / total_items if total_items > 0 else 0.0
-    min_price = min(item.price for item in items_list) if items_list else 0.0
-    max_price = max(item.price for item in items_list) if items_list else 0.0
+    min_price = aggregate.min_price if total_items else 0.0
+    max_price = aggregate.max_price if total_items else 0.0
     
     return ItemsSummaryResponse(
         statistics=ItemsStatistics(
@@ -114,7 +125,8 @@ async def get_items_summary() -> ItemsSummaryResponse:
             min_price=round(min_price, 2),
             max_price=round(max_price, 2)
         ),
-        items=items_with_owners
+        items=items_with_owners,
+        has_more=max(skip, 0) + len(items_with_owners) < total_items
     )
 
 
@@ -140,7 +152,8 @@ async def get_user_report(user_id: int) -> UserReportResponse:
             detail=f"User with ID {user_id} not found"
         )
     
-    user_items = await items.get_items_by_user(user_id)
+    # Only the user's shard holds their items
+    user_items = [item.to_response() for item in items.items_db.items_of(user_id)]
     
     total_items = len(user_items)
     total_value = sum(item.price for item in user_items)
@@ -179,28 +192,29 @@ async def get_system_overview() -> SystemOverviewResponse:
     - Top users by total value
     """
     users_list = await users.get_users()
-    items_list = await items.get_items()
+    # Only counts and totals are needed, which the shards keep up to date
+    aggregate = merge_totals(items.items_db)
     
     total_users = len(users_list)
-    total_items = len(items_list)
-    total_value = sum(item.price for item in items_list)
+    total_items = aggregate.count
+    total_value = aggregate.total
     avg_price = total_value / total_items if total_items > 0 else 0.0
     
     user_stats = []
     for user in users_list:
-        user_items = [item for item in items_list if item.owner_id == user.id]
+        item_count, user_value = aggregate.per_owner.get(user.id, (0, 0.0))
         user_stats.append(
             UserStats(
                 user_id=user.id,
                 user_name=user.full_name,
                 user_email=user.email,
-                item_count=len(user_items),
-                total_value=round(sum(item.price for item in user_items), 2)
+                item_count=item_count,
+                total_value=round(user_value, 2)
             )
         )
     
-    top_by_count = sorted(user_stats, key=lambda x: x.item_count, reverse=True)[:5]
-    top_by_value = sorted(user_stats, key=lambda x: x.total_value, reverse=True)[:5]
+    top_by_count = heapq.nlargest(5, user_stats, key=lambda x: x.item_count)
+    top_by_value = heapq.nlargest(5, user_stats, key=lambda x: x.total_value)
     
     return SystemOverviewResponse(
         overview=SystemOverviewStats(
@@ -223,23 +237,22 @@ async def get_system_overview() -> SystemOverviewResponse:
 )
 async def get_items_by_price_range(
     min_price: Optional[float] = None,
-    max_price: Optional[float] = None
+    max_price: Optional[float] = None,
+    skip: int = 0,
+    limit: int = 100
 ) -> ItemsByPriceRangeResponse:
     """
     Get items filtered by price range.
     
     - **min_price**: Minimum price filter (optional)
     - **max_price**: Maximum price filter (optional)
+    - **skip**: Number of matching items to skip (for pagination)
+    - **limit**: Maximum number of items to return (default: 100)
     
-    Returns items within the specified price range with owner information.
+    Returns a page of items within the specified price range with owner information.
     """
-    items_list = await items.get_items()
-    
-    filtered_items = items_list
-    if min_price is not None:
-        filtered_items = [item for item in filtered_items if item.price >= min_price]
-    if max_price is not None:
-        filtered_items = [item for item in filtered_items if item.price <= max_price]
+    matching_items = await items_in_price_range(items.items_db, min_price, max_price)
+    filtered_items = [item.to_response() for item in matching_items[skip : skip + limit]]
     
     users_list = await users.get_users()
     users_dict = {user.id: user for user in users_list}
@@ -259,7 +272,70 @@ async def get_items_by_price_range(
             min_price=min_price,
             max_price=max_price
         ),
-        total_items=len(items_with_owners),
-        items=items_with_owners
+        total_items=len(matching_items),
+        items=items_with_owners,
+        has_more=max(skip, 0) + len(items_with_owners) < len(matching_items)
     )
 
+
+@router.get(
+    "/activity",
+    response_model=ActivityReportResponse,
+    summary="Activity report",
+    description="Generates a time-bucketed report of users and items activity"
+)
+async def get_activity(
+    granularity: Granularity = Granularity.DAY,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> ActivityReportResponse:
+    """
+    Get activity rollups per time bucket.
+    
+    - **granularity**: Bucket size: hour, day or week (default: day)
+    - **start**: Start of the range, inclusive (optional, UTC)
+    - **end**: End of the range, exclusive (optional, UTC)
+    
+    Returns only buckets with activity, read from pre-aggregated rollups.
+    Buckets are never split, so the range is widened to whole buckets and
+    the returned `start` / `end` are the aligned boundaries actually covered.
+    """
+    start = as_naive_utc(start) if start is not None else None
+    end = as_naive_utc(end) if end is not None else None
+    
+    if start is not None and end is not None and start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be earlier than end"
+        )
+    
+    if start is not None:
+        start = bucket_start(start, granularity)
+    if end is not None:
+        end = bucket_end(end, granularity)
+    
+    buckets = activity_index.range(granularity, start, end)
+    
+    return ActivityReportResponse(
+        granularity=granularity,
+        start=start,
+        end=end,
+        totals=ActivityTotals(
+            items_created=sum(bucket.items_created for bucket in buckets),
+            value_created=round(sum(bucket.value_created for bucket in buckets), 2),
+            users_created=sum(bucket.users_created for bucket in buckets)
+        ),
+        buckets=[
+            ActivityBucketStats(
+                bucket_start=bucket.start,
+                items_created=bucket.items_created,
+                items_updated=bucket.items_updated,
+                items_deleted=bucket.items_deleted,
+                value_created=round(bucket.value_created, 2),
+                users_created=bucket.users_created,
+                users_updated=bucket.users_updated,
+                users_deleted=bucket.users_deleted
+            )
+            for bucket in buckets
+        ]
+    )
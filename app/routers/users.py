@@ -5,6 +5,9 @@ from typing import List
 from fastapi import APIRouter, HTTPException, status
 from datetime import datetime
 from app.models import UserCreate, UserUpdate, UserResponse
+from app.activity import activity_index
+from app.changes import change_log
+from app.records import UserRecord, to_epoch_us
 
 router = APIRouter()
 
@@ -29,24 +32,27 @@ async def create_user(user: UserCreate) -> UserResponse:
     global user_id_counter
     
     for existing_user in users_db.values():
-        if existing_user["email"] == user.email:
+        if existing_user.email == user.email:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
     
     now = datetime.utcnow()
-    new_user = {
-        "id": user_id_counter,
-        "email": user.email,
-        "full_name": user.full_name,
-        "created_at": now,
-        "updated_at": None
-    }
+    new_user = UserRecord(
+        id=user_id_counter,
+        email=user.email,
+        full_name=user.full_name,
+        created_at=to_epoch_us(now)
+    )
     users_db[user_id_counter] = new_user
     user_id_counter += 1
+    activity_index.record_user_created(now)
     
-    return UserResponse(**new_user)
+    created = new_user.to_response()
+    change_log.append("user", "create", created.id, created)
+    
+    return created
 
 
 @router.get(
@@ -61,7 +67,7 @@ async def get_users() -> List[UserResponse]:
     
     Returns a list of all registered users.
     """
-    return [UserResponse(**user) for user in users_db.values()]
+    return [user.to_response() for user in users_db.values()]
 
 
 @router.get(
@@ -82,7 +88,7 @@ async def get_user(user_id: int) -> UserResponse:
             detail=f"User with ID {user_id} not found"
         )
     
-    return UserResponse(**users_db[user_id])
+    return users_db[user_id].to_response()
 
 
 @router.put(
@@ -108,9 +114,9 @@ async def update_user(user_id: int, user_update: UserUpdate) -> UserResponse:
     user = users_db[user_id]
     
     # Check if new email already exists (if provided)
-    if user_update.email and user_update.email != user["email"]:
+    if user_update.email and user_update.email != user.email:
         for existing_user in users_db.values():
-            if existing_user["email"] == user_update.email and existing_user["id"] != user_id:
+            if existing_user.email == user_update.email and existing_user.id != user_id:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Email already registered"
@@ -118,13 +124,18 @@ async def update_user(user_id: int, user_update: UserUpdate) -> UserResponse:
     
     # Update user fields
     if user_update.email is not None:
-        user["email"] = user_update.email
+        user.email = user_update.email
     if user_update.full_name is not None:
-        user["full_name"] = user_update.full_name
+        user.full_name = user_update.full_name
+    
+    now = datetime.utcnow()
+    user.updated_at = to_epoch_us(now)
+    activity_index.record_user_updated(now)
     
-    user["updated_at"] = datetime.utcnow()
+    updated = user.to_response()
+    change_log.append("user", "update", user_id, updated)
     
-    return UserResponse(**user)
+    return updated
 
 
 @router.delete(
@@ -146,4 +157,6 @@ async def delete_user(user_id: int):
         )
     
     del users_db[user_id]
+    activity_index.record_user_deleted(datetime.utcnow())
+    change_log.append("user", "delete", user_id)
     return None
@@ -0,0 +1,62 @@
+"""
+Benchmark - CPU cost versus bytes saved when compressing report payloads
+
+Usage:
+    python -m benchmarks.bench_compression [--users N] [--items N] [--repeat N]
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from app.compression import compress
+from app.models import ItemCreate, UserCreate
+from app.routers import items, reports, users
+
+
+async def build_payload(user_count: int, item_count: int) -> bytes:
+    """Populate the in-memory stores and render the users summary report."""
+    rng = random.Random(42)
+    for user_id in range(1, user_count + 1):
+        await users.create_user(UserCreate(email=f"user{user_id}@example.com", full_name=f"User {user_id}"))
+    for item_id in range(1, item_count + 1):
+        await items.create_item(
+            ItemCreate(
+                title=f"Product {rng.randrange(1000)}",
+                description="Benchmark item" if item_id % 2 else None,
+                price=round(rng.uniform(1, 1000), 2),
+            ),
+            owner_id=rng.randint(1, user_count),
+        )
+    report = await reports.get_users_summary()
+    return report.model_dump_json().encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--items", type=int, default=2_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    payload = asyncio.run(build_payload(args.users, args.items))
+    print(f"payload={len(payload) / 2**20:.2f} MiB (users-summary, {args.users} users, {args.items} items)")
+    print(f"{'encoding':>8} {'level':>5} {'median ms':>10} {'MiB/s':>8} {'bytes out':>10} {'saved':>7}")
+    for encoding in ("gzip", "deflate"):
+        for level in (1, 3, 6, 9):
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                compressed = compress(payload, encoding, level)
+                timings.append(time.perf_counter() - started)
+            median = statistics.median(timings)
+            print(
+                f"{encoding:>8} {level:>5} {median * 1000:>10.1f} "
+                f"{len(payload) / 2**20 / median:>8.1f} {len(compressed):>10} "
+                f"{1 - len(compressed) / len(payload):>7.1%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark - Memory per stored item: plain dict rows vs the item store
+
+Usage:
+    python -m benchmarks.bench_memory [--items N] [--titles N] [--partitions N]
+
+The store layout is the one items_db uses: ItemRecord rows in a
+PartitionedItemStore, including its per-shard bookkeeping.
+
+Runs two scenarios: titles repeating among `--titles` distinct values,
+and mostly unique text where every row has its own title and a longer
+description, as in typical user-entered data.
+"""
+import argparse
+import gc
+import random
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Optional
+
+from app.partitioning import PartitionedItemStore
+from app.records import ItemRecord, to_epoch_us
+
+
+def generate_rows(item_count: int, title_count: Optional[int]):
+    """
+    Yield item fields as they arrive from requests.
+
+    Titles and descriptions are rebuilt for every row, like strings
+    decoded from separate request bodies, even when their text repeats.
+    With `title_count` None every row gets unique text.
+    """
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1)
+    for item_id in range(1, item_count + 1):
+        if title_count is None:
+            title = f"Product {item_id} {rng.getrandbits(32):08x}"
+            description = f"Description of product {item_id}: " + " ".join(
+                f"{rng.getrandbits(24):06x}" for _ in range(8)
+            )
+        else:
+            title_id = rng.randrange(title_count)
+            title = f"Product {title_id}"
+            description = f"Description of product {title_id}" if title_id % 2 else None
+        yield (
+            item_id,
+            title,
+            description,
+            round(rng.uniform(1, 1000), 2),
+            rng.randint(1, 100_000),
+            start + timedelta(seconds=item_id),
+        )
+
+
+def build_dicts(rows) -> dict:
+    return {
+        item_id: {
+            "id": item_id,
+            "title": title,
+            "description": description,
+            "price": price,
+            "owner_id": owner_id,
+            "created_at": created_at,
+            "updated_at": None,
+        }
+        for item_id, title, description, price, owner_id, created_at in rows
+    }
+
+
+def build_store(rows, partitions: int) -> PartitionedItemStore:
+    store = PartitionedItemStore(partitions)
+    for item_id, title, description, price, owner_id, created_at in rows:
+        store[item_id] = ItemRecord(
+            id=item_id,
+            title=title,
+            description=description,
+            price=price,
+            owner_id=owner_id,
+            created_at=to_epoch_us(created_at),
+        )
+    return store
+
+
+def measure(builder, item_count: int, title_count: Optional[int], *args) -> int:
+    """Bytes retained by a store built with `builder`."""
+    gc.collect()
+    tracemalloc.start()
+    store = builder(generate_rows(item_count, title_count), *args)
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del store
+    return retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--titles", type=int, default=1_000)
+    parser.add_argument("--partitions", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"items={args.items} partitions={args.partitions}")
+    print(f"{'text':>16} {'layout':>8} {'total MiB':>10} {'bytes/row':>10}")
+    for text, title_count in ((f"{args.titles} titles", args.titles), ("unique", None)):
+        baseline = None
+        for name, builder, extra in (("dict", build_dicts, ()), ("store", build_store, (args.partitions,))):
+            retained = measure(builder, args.items, title_count, *extra)
+            per_row = retained / args.items
+            baseline = baseline or per_row
+            print(
+                f"{text:>16} {name:>8} {retained / 2**20:>10.1f} {per_row:>10.1f}"
+                f"  ({per_row / baseline:.0%} of dict)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark - Report aggregation latency by number of partitions and workers
+
+Usage:
+    python -m benchmarks.bench_partitions [--items N] [--owners N] [--repeat N]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.partitioning import PartitionedItemStore, aggregate_items, items_in_price_range
+from app.records import ItemRecord
+
+
+def build_store(partitions: int, item_count: int, owner_count: int) -> PartitionedItemStore:
+    rng = random.Random(42)
+    store = PartitionedItemStore(partitions)
+    for item_id in range(1, item_count + 1):
+        store[item_id] = ItemRecord(
+            id=item_id,
+            title="item",
+            description=None,
+            price=round(rng.uniform(1, 1000), 2),
+            owner_id=rng.randint(1, owner_count),
+            created_at=0,
+        )
+    return store
+
+
+def measure(report, store, executor, repeat: int) -> float:
+    """Median latency of a report coroutine in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        asyncio.run(report(store, executor))
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+async def summary(store, executor):
+    return await aggregate_items(store, executor, min_parallel_items=0)
+
+
+async def price_range(store, executor):
+    return await items_in_price_range(store, 100.0, 200.0, executor, min_parallel_items=0)
+
+
+REPORTS = (("summary", summary), ("price-range", price_range))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--owners", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    cpu_count = os.cpu_count() or 1
+    partition_counts = [1, 2, 4, 8, 16]
+    worker_counts = sorted({1, 2, 4, cpu_count})
+
+    print(f"items={args.items} owners={args.owners} cpus={cpu_count}")
+    print(f"{'partitions':>10} {'workers':>8}" + "".join(f" {name + ' ms':>15}" for name, _ in REPORTS))
+    for partitions in partition_counts:
+        store = build_store(partitions, args.items, args.owners)
+        for workers in worker_counts:
+            if workers == 1:
+                latencies = [measure(report, store, None, args.repeat) for _, report in REPORTS]
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    # Warm up so process start-up is not counted
+                    measure(summary, store, executor, 1)
+                    latencies = [measure(report, store, executor, args.repeat) for _, report in REPORTS]
+            print(f"{partitions:>10} {workers:>8}" + "".join(f" {latency:>15.1f}" for latency in latencies))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Replay - Re-drive captured traffic in-process and compare latencies and responses
+
+Usage:
+    python -m benchmarks.replay traffic.ndjson.1 traffic.ndjson [--speed X | --max-speed]
+
+Captures are produced by app.capture.TrafficCaptureMiddleware. Requests are
+sent straight to the ASGI app, without a server or network, in the order
+they were recorded.
+
+The app is imported fresh, so replay starts from empty in-memory stores:
+captures should begin when the server starts, so that replayed creates
+assign the same IDs that later requests refer to.
+"""
+import argparse
+import asyncio
+import hashlib
+import importlib
+import json
+import os
+import re
+import statistics
+import time
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from app.capture import decode_body, decode_json, stable_digest, strip_volatile
+
+ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def load_app(target: str):
+    """Import an ASGI app given as 'module:attribute'."""
+    module_name, _, attribute = target.partition(":")
+    return getattr(importlib.import_module(module_name), attribute or "app")
+
+
+def load_records(paths: List[str]) -> List[dict]:
+    """Read capture files and order their records by start time."""
+    records = []
+    for path in paths:
+        with open(path, encoding="utf-8") as capture:
+            records.extend(json.loads(line) for line in capture if line.strip())
+    records.sort(key=lambda record: record["ts"])
+    return records
+
+
+def route_of(record: dict) -> str:
+    """Group key for a request: method and path with numeric IDs collapsed."""
+    return f"{record['method']} {ID_SEGMENT.sub('/{id}', record['path'])}"
+
+
+async def send_request(app, record: dict) -> Tuple[int, bytes, Optional[str], float]:
+    """
+    Send one captured request to an ASGI app.
+
+    Returns the status, the body as sent, its content encoding and the
+    latency in milliseconds.
+    """
+    body = decode_body(record.get("body"), record.get("body_encoding"))
+    headers = [(b"host", b"replay"), (b"content-length", str(len(body)).encode())]
+    if record.get("content_type"):
+        headers.append((b"content-type", record["content_type"].encode("latin-1")))
+    if record.get("accept_encoding"):
+        headers.append((b"accept-encoding", record["accept_encoding"].encode("latin-1")))
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": record["method"],
+        "scheme": "http",
+        "path": record["path"],
+        "raw_path": record["path"].encode(),
+        "query_string": record.get("query", "").encode("latin-1"),
+        "root_path": "",
+        "headers": headers,
+        "client": ("127.0.0.1", 0),
+        "server": ("replay", 80),
+    }
+    request_sent = False
+    response_complete = asyncio.Event()
+    response = {"status": None, "content_encoding": None}
+    chunks = []
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await response_complete.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            for name, value in message.get("headers", []):
+                if name.lower() == b"content-encoding":
+                    response["content_encoding"] = value.decode("latin-1")
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                response_complete.set()
+
+    started = time.perf_counter()
+    await app(scope, receive, send)
+    latency_ms = (time.perf_counter() - started) * 1000
+    return response["status"], b"".join(chunks), response["content_encoding"], latency_ms
+
+
+def decompress(body: bytes, content_encoding: Optional[str]) -> bytes:
+    """Undo gzip/deflate content encoding so bodies compare as built by the handlers."""
+    if content_encoding == "gzip":
+        return zlib.decompress(body, 31)
+    if content_encoding == "deflate":
+        return zlib.decompress(body)
+    return body
+
+
+def body_checked(record: dict) -> bool:
+    """Whether a captured response body can be compared beyond its raw digest."""
+    return "response_body" in record or "response_stable_sha256" in record
+
+
+def compare(
+    record: dict,
+    status: int,
+    body: bytes,
+    content_encoding: Optional[str]
+) -> Optional[str]:
+    """
+    Describe how a replayed response differs from the captured one, if it does.
+
+    Bodies captured only as a raw digest are not compared, since that
+    digest also covers volatile fields; see body_checked.
+    """
+    if status != record.get("status"):
+        return f"status {record.get('status')} -> {status}"
+    if hashlib.sha256(body).hexdigest() == record.get("response_sha256"):
+        return None
+    if "response_body" not in record:
+        if "response_stable_sha256" not in record:
+            return None
+        try:
+            if stable_digest(decode_json(body, content_encoding)) == record["response_stable_sha256"]:
+                return None
+        except ValueError:
+            pass
+        return "body digest differs"
+    expected = decode_body(record["response_body"], record.get("response_body_encoding"))
+    if not record.get("response_body_redacted"):
+        # Redacted bodies are stored already decoded
+        expected = decompress(expected, record.get("content_encoding"))
+    body = decompress(body, content_encoding)
+    try:
+        if strip_volatile(json.loads(expected)) == strip_volatile(json.loads(body)):
+            return None
+    except ValueError:
+        pass
+    return "body differs"
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+async def replay(app, records: List[dict], speed: Optional[float]) -> List[dict]:
+    """
+    Replay records against an app.
+
+    With `speed` set, each request starts at its original offset divided
+    by `speed`, so overlapping requests overlap again. Without it, requests
+    run one after another as fast as possible.
+    """
+    results: List[Optional[dict]] = [None] * len(records)
+
+    async def run(index: int, record: dict) -> None:
+        status, body, content_encoding, latency_ms = await send_request(app, record)
+        results[index] = {
+            "record": record,
+            "latency_ms": latency_ms,
+            "mismatch": compare(record, status, body, content_encoding),
+        }
+
+    if speed is None:
+        for index, record in enumerate(records):
+            await run(index, record)
+        return results
+
+    tasks = []
+    first_ts = records[0]["ts"] if records else 0.0
+    started = time.perf_counter()
+    for index, record in enumerate(records):
+        delay = (record["ts"] - first_ts) / speed - (time.perf_counter() - started)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(run(index, record)))
+    await asyncio.gather(*tasks)
+    return results
+
+
+def print_report(results: List[dict], skipped: int, elapsed: float, show_mismatches: int) -> None:
+    by_route: Dict[str, List[dict]] = defaultdict(list)
+    for result in results:
+        by_route[route_of(result["record"])].append(result)
+    by_route["ALL"] = results
+
+    unchecked = sum(1 for result in results if not body_checked(result["record"]))
+    print(f"replayed={len(results)} skipped={skipped} unchecked bodies={unchecked} elapsed={elapsed:.2f}s")
+    print(
+        f"{'route':<40} {'count':>6} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} "
+        f"{'max ms':>8} {'orig p50':>9} {'orig p99':>9} {'diffs':>6}"
+    )
+    for route, route_results in sorted(by_route.items(), key=lambda entry: entry[0] == "ALL"):
+        latencies = [result["latency_ms"] for result in route_results]
+        original = [result["record"]["duration_ms"] for result in route_results]
+        mismatches = sum(1 for result in route_results if result["mismatch"])
+        print(
+            f"{route:<40} {len(route_results):>6} {percentile(latencies, 0.5):>8.2f} "
+            f"{percentile(latencies, 0.9):>8.2f} {percentile(latencies, 0.99):>8.2f} "
+            f"{max(latencies):>8.2f} {statistics.median(original):>9.2f} "
+            f"{percentile(original, 0.99):>9.2f} {mismatches:>6}"
+        )
+
+    mismatched = [result for result in results if result["mismatch"]]
+    for result in mismatched[:show_mismatches]:
+        record = result["record"]
+        query = f"?{record['query']}" if record.get("query") else ""
+        print(f"  mismatch: {record['method']} {record['path']}{query}: {result['mismatch']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("captures", nargs="+", help="Capture files, in any order")
+    parser.add_argument("--app", default="app.main:app", help="ASGI app as module:attribute")
+    pacing = parser.add_mutually_exclusive_group()
+    pacing.add_argument("--speed", type=float, default=1.0, help="Pacing factor (1.0 = original)")
+    pacing.add_argument("--max-speed", action="store_true", help="Send requests back to back")
+    parser.add_argument("--show-mismatches", type=int, default=20)
+    args = parser.parse_args()
+
+    if not args.max_speed and args.speed <= 0:
+        parser.error("--speed must be greater than 0")
+
+    records = load_records(args.captures)
+    replayable = [record for record in records if not record.get("body_omitted")]
+    if not replayable:
+        parser.error("no replayable requests in the capture files")
+
+    # Importing the app must not start capturing the replayed traffic
+    os.environ.pop("TRAFFIC_CAPTURE_PATH", None)
+    app = load_app(args.app)
+    started = time.perf_counter()
+    results = asyncio.run(replay(app, replayable, None if args.max_speed else args.speed))
+    elapsed = time.perf_counter() - started
+    print_report(results, len(records) - len(replayable), elapsed, args.show_mismatches)
+
+
+if __name__ == "__main__":
+    main()
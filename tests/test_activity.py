@@ -0,0 +1,78 @@
+"""
+Tests for the activity rollups and the activity report
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app.activity import ActivityIndex, Granularity, bucket_end, bucket_start
+from app.routers import reports
+
+
+def test_bucket_start_truncates_to_granularity():
+    timestamp = datetime(2024, 5, 15, 13, 45, 12, 500)
+
+    assert bucket_start(timestamp, Granularity.HOUR) == datetime(2024, 5, 15, 13)
+    assert bucket_start(timestamp, Granularity.DAY) == datetime(2024, 5, 15)
+
+
+def test_week_starts_on_monday():
+    # 2024-05-19 is a Sunday, 2024-05-20 a Monday
+    assert bucket_start(datetime(2024, 5, 19, 23, 59), Granularity.WEEK) == datetime(2024, 5, 13)
+    assert bucket_start(datetime(2024, 5, 20, 0, 0), Granularity.WEEK) == datetime(2024, 5, 20)
+
+
+def test_bucket_end_rounds_up_unless_on_a_boundary():
+    assert bucket_end(datetime(2024, 5, 15, 13, 1), Granularity.HOUR) == datetime(2024, 5, 15, 14)
+    assert bucket_end(datetime(2024, 5, 15), Granularity.DAY) == datetime(2024, 5, 15)
+    assert bucket_end(datetime(2024, 5, 15, 0, 1), Granularity.WEEK) == datetime(2024, 5, 20)
+
+
+def test_range_is_half_open():
+    index = ActivityIndex()
+    for day in (14, 15, 16):
+        index.record_item_created(datetime(2024, 5, day, 12), 10.0)
+
+    buckets = index.range(Granularity.DAY, datetime(2024, 5, 14), datetime(2024, 5, 16))
+
+    assert [bucket.start for bucket in buckets] == [datetime(2024, 5, 14), datetime(2024, 5, 15)]
+
+
+def test_range_includes_partially_covered_buckets():
+    index = ActivityIndex()
+    index.record_item_created(datetime(2024, 5, 15, 8), 10.0)
+    index.record_item_created(datetime(2024, 5, 15, 20), 5.0)
+
+    buckets = index.range(Granularity.DAY, datetime(2024, 5, 15, 12), datetime(2024, 5, 15, 13))
+
+    assert len(buckets) == 1
+    assert buckets[0].items_created == 2
+    assert buckets[0].value_created == 15.0
+
+
+def test_range_accepts_timezone_aware_bounds():
+    index = ActivityIndex()
+    index.record_user_created(datetime(2024, 5, 15, 10))
+    utc_minus_five = timezone(timedelta(hours=-5))
+
+    # 04:00-06:00 at UTC-5 is 09:00-11:00 UTC
+    buckets = index.range(
+        Granularity.HOUR,
+        datetime(2024, 5, 15, 4, tzinfo=utc_minus_five),
+        datetime(2024, 5, 15, 6, tzinfo=utc_minus_five)
+    )
+
+    assert [bucket.start for bucket in buckets] == [datetime(2024, 5, 15, 10)]
+
+
+def test_report_echoes_aligned_range():
+    utc_plus_two = timezone(timedelta(hours=2))
+
+    report = asyncio.run(reports.get_activity(
+        Granularity.WEEK,
+        datetime(2024, 5, 15, 1, tzinfo=utc_plus_two),
+        datetime(2024, 5, 21, 12)
+    ))
+
+    assert report.granularity is Granularity.WEEK
+    assert report.start == datetime(2024, 5, 13)
+    assert report.end == datetime(2024, 5, 27)
@@ -0,0 +1,115 @@
+"""
+Tests for traffic capture and replay comparison
+"""
+import asyncio
+import gzip
+import json
+import logging
+
+from app.capture import CaptureFormatter, TrafficCaptureMiddleware
+from benchmarks import replay
+
+
+def format_exchange(formatter, **fields):
+    exchange = {"query": "", "content_encoding": None, **fields}
+    record = logging.LogRecord("capture", logging.INFO, __file__, 0, exchange, (), None)
+    return json.loads(formatter.format(record))
+
+
+def test_personal_fields_are_pseudonymized_in_bodies_and_query():
+    formatter = CaptureFormatter()
+    request = {"email": "jane@corp.com", "full_name": "Jane Doe"}
+    response = {"users_summary": [{"user": {"id": 1, **request}}]}
+
+    line = format_exchange(
+        formatter,
+        query="email=jane%40corp.com&limit=5",
+        content_encoding="gzip",
+        body=json.dumps(request).encode(),
+        response_body=gzip.compress(json.dumps(response).encode()),
+    )
+
+    captured = json.dumps(line)
+    assert "jane" not in captured and "Jane" not in captured
+    body = json.loads(line["body"])
+    user = json.loads(line["response_body"])["users_summary"][0]["user"]
+    assert line["response_body_redacted"] is True
+    assert user["id"] == 1
+    # The same value gets the same pseudonym everywhere, and emails stay valid
+    assert user["email"] == body["email"] and body["email"].endswith("@redacted.example.com")
+    assert user["full_name"] == body["full_name"]
+    assert "limit=5" in line["query"]
+
+
+def test_redact_hook_runs_last():
+    def drop_bodies(exchange):
+        exchange.pop("body", None)
+        return exchange
+
+    formatter = CaptureFormatter(redact_fields=(), redact=drop_bodies)
+
+    line = format_exchange(formatter, body=b'{"email": "jane@corp.com"}', response_body=b"[]")
+
+    assert "body" not in line
+    assert line["response_body"] == "[]"
+    assert "response_body_redacted" not in line
+
+
+def run_requests(middleware, methods):
+    async def main():
+        for method in methods:
+            scope = {"type": "http", "method": method, "path": "/items", "query_string": b"", "headers": []}
+
+            async def receive():
+                return {"type": "http.request", "body": b"", "more_body": False}
+
+            async def send(message):
+                pass
+
+            await middleware(scope, receive, send)
+
+    asyncio.run(main())
+    middleware.close()
+
+
+def json_app(payload):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": json.dumps(payload).encode()})
+
+    return app
+
+
+def test_sample_rate_applies_only_to_reads(tmp_path):
+    path = tmp_path / "traffic.ndjson"
+    middleware = TrafficCaptureMiddleware(json_app([]), str(path), sample_rate=0.0)
+
+    run_requests(middleware, ["GET", "POST", "GET", "PUT", "DELETE", "HEAD"])
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [record["method"] for record in records] == ["POST", "PUT", "DELETE"]
+
+
+def test_large_response_replays_by_stable_digest(tmp_path):
+    path = tmp_path / "traffic.ndjson"
+    rows = [{"id": row, "title": "item", "created_at": "2024-01-01T00:00:00"} for row in range(50)]
+    middleware = TrafficCaptureMiddleware(json_app(rows), str(path), max_body_bytes=100)
+
+    run_requests(middleware, ["GET"])
+
+    record = json.loads(path.read_text())
+    assert "response_body" not in record and "response_stable_sha256" in record
+    assert replay.body_checked(record)
+    # Same content, different timestamps: not a mismatch
+    for row in rows:
+        row["created_at"] = "2025-06-01T12:00:00"
+    assert replay.compare(record, 200, json.dumps(rows).encode(), None) is None
+    rows[0]["title"] = "changed"
+    assert replay.compare(record, 200, json.dumps(rows).encode(), None) == "body digest differs"
+
+
+def test_raw_digest_only_is_not_a_mismatch():
+    record = {"status": 200, "response_sha256": "0" * 64}
+
+    assert not replay.body_checked(record)
+    assert replay.compare(record, 200, b'{"created_at": "now"}', None) is None
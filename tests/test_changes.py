@@ -0,0 +1,70 @@
+"""
+Tests for the change log behind the change feed
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.changes import ChangeLog, ResyncRequired
+
+
+def test_since_returns_changes_after_sequence():
+    log = ChangeLog()
+    for entity_id in range(1, 4):
+        log.append("item", "create", entity_id)
+
+    changes = log.since(1, 10, log.epoch)
+
+    assert [change.seq for change in changes] == [2, 3]
+
+
+def test_since_requires_resync_after_eviction():
+    log = ChangeLog(max_size=2)
+    for entity_id in range(1, 5):
+        log.append("item", "create", entity_id)
+
+    with pytest.raises(ResyncRequired):
+        log.since(1, 10, log.epoch)
+
+
+def test_since_requires_resync_for_other_epoch():
+    # A restarted server starts a new log; old cursors must not resume on it
+    previous = ChangeLog()
+    for entity_id in range(1, 6):
+        previous.append("item", "create", entity_id)
+    restarted = ChangeLog()
+    for entity_id in range(1, 9):
+        restarted.append("item", "create", entity_id)
+
+    with pytest.raises(ResyncRequired):
+        restarted.since(5, 10, previous.epoch)
+    with pytest.raises(ResyncRequired):
+        restarted.since(5, 10)
+
+
+def test_timed_out_long_polls_on_different_event_loops():
+    log = ChangeLog()
+
+    # Each asyncio.run uses a fresh event loop, like separate TestClient calls
+    asyncio.run(log.wait(0, 0.05))
+    asyncio.run(log.wait(0, 0.05))
+
+    assert log.since(0, 10) == []
+
+
+def test_append_wakes_long_poll():
+    log = ChangeLog()
+
+    async def poll_and_append():
+        async def append_later():
+            await asyncio.sleep(0.05)
+            log.append("user", "delete", 1)
+
+        asyncio.get_running_loop().create_task(append_later())
+        started = time.perf_counter()
+        await log.wait(0, 5)
+        return time.perf_counter() - started
+
+    assert asyncio.run(poll_and_append()) < 1
+    assert [change.seq for change in log.since(0, 10)] == [1]
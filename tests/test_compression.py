@@ -0,0 +1,171 @@
+"""
+Tests for the compression middleware
+"""
+import asyncio
+import threading
+import zlib
+
+import pytest
+
+from app.changes import change_log
+from app.compression import CompressionMiddleware, negotiate_encoding
+
+
+def make_app(chunks, status=200, calls=None):
+    async def app(scope, receive, send):
+        if calls is not None:
+            calls.append(scope["path"])
+        await send({"type": "http.response.start", "status": status, "headers": [(b"content-type", b"text/plain")]})
+        for index, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": index < len(chunks) - 1})
+
+    return app
+
+
+def request(middleware, path="/data", accept_encoding=b"gzip"):
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": b"",
+        "headers": [(b"accept-encoding", accept_encoding)],
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(middleware(scope, receive, send))
+    headers = dict(messages[0]["headers"])
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    return headers, body
+
+
+def compression_threads(monkeypatch, middleware, path="/data"):
+    """Request `path` and return the threads the compressor ran in."""
+    threads = set()
+    original = zlib.compressobj
+
+    def tracking_compressobj(*args):
+        compressor = original(*args)
+
+        class Tracking:
+            def compress(self, data):
+                threads.add(threading.get_ident())
+                return compressor.compress(data)
+
+            def flush(self, *mode):
+                return compressor.flush(*mode)
+
+        return Tracking()
+
+    monkeypatch.setattr(zlib, "compressobj", tracking_compressobj)
+    headers, body = request(middleware, path)
+    return headers, body, threads
+
+
+def test_large_body_is_compressed_off_the_event_loop(monkeypatch):
+    payload = b"report " * 20000
+    middleware = CompressionMiddleware(make_app([payload]), threadpool_minimum_size=1024)
+
+    headers, body, threads = compression_threads(monkeypatch, middleware)
+
+    assert headers[b"content-encoding"] == b"gzip"
+    assert zlib.decompress(body, 31) == payload
+    assert threads and threading.get_ident() not in threads
+
+
+def test_small_body_is_compressed_inline(monkeypatch):
+    payload = b"report " * 200
+    middleware = CompressionMiddleware(make_app([payload]), threadpool_minimum_size=64 * 1024)
+
+    headers, body, threads = compression_threads(monkeypatch, middleware)
+
+    assert zlib.decompress(body, 31) == payload
+    assert threads == {threading.get_ident()}
+
+
+def test_cached_and_streamed_bodies_round_trip_through_threadpool():
+    chunks = [b"chunk " * 5000, b"chunk " * 5000, b"end"]
+    streamed = CompressionMiddleware(make_app(chunks), threadpool_minimum_size=1024)
+    cached = CompressionMiddleware(make_app(chunks), threadpool_minimum_size=1024, cache_prefixes=("/reports/",))
+
+    _, streamed_body = request(streamed)
+    _, cached_body = request(cached, "/reports/summary")
+
+    assert zlib.decompress(streamed_body, 31) == b"".join(chunks)
+    assert zlib.decompress(cached_body, 31) == b"".join(chunks)
+
+
+def cached_middleware(calls, status=200):
+    return CompressionMiddleware(
+        make_app([b"report " * 500], status, calls), cache_prefixes=("/reports/",)
+    )
+
+
+def test_repeated_report_skips_the_handler_and_compressor(monkeypatch):
+    calls = []
+    middleware = cached_middleware(calls)
+
+    _, first = request(middleware, "/reports/summary")
+    monkeypatch.setattr(zlib, "compressobj", None)
+    headers, second = request(middleware, "/reports/summary")
+
+    assert calls == ["/reports/summary"]
+    assert second == first
+    assert headers[b"content-encoding"] == b"gzip"
+
+
+def test_cached_report_serves_each_encoding():
+    calls = []
+    middleware = cached_middleware(calls)
+
+    _, gzipped = request(middleware, "/reports/summary")
+    headers, deflated = request(middleware, "/reports/summary", b"deflate")
+    plain_headers, plain = request(middleware, "/reports/summary", b"identity")
+
+    assert len(calls) == 1
+    assert headers[b"content-encoding"] == b"deflate"
+    assert zlib.decompress(deflated) == zlib.decompress(gzipped, 31) == plain
+    assert b"content-encoding" not in plain_headers
+
+
+def test_change_invalidates_cached_report():
+    calls = []
+    middleware = cached_middleware(calls)
+
+    request(middleware, "/reports/summary")
+    change_log.append("item", "create", 1)
+    request(middleware, "/reports/summary")
+
+    assert len(calls) == 2
+
+
+def test_error_responses_are_not_cached():
+    calls = []
+    middleware = cached_middleware(calls, status=404)
+
+    request(middleware, "/reports/summary")
+    request(middleware, "/reports/summary")
+
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip, deflate", "gzip"),
+    ("deflate", "deflate"),
+    ("gzip;q=0.5, deflate;q=0.8", "deflate"),
+    ("gzip; q=0.9, deflate; q=0.9", "gzip"),
+    ("br, *", "gzip"),
+    ("gzip;q=0, *", "deflate"),
+    ("*;q=0", None),
+    ("identity", None),
+    ("identity, gzip;q=0", None),
+    ("gzip;q=invalid", None),
+    ("", None),
+])
+def test_negotiate_encoding(accept_encoding, expected):
+    assert negotiate_encoding(accept_encoding) == expected
@@ -0,0 +1,145 @@
+"""
+Tests for the partitioned item store and its running aggregates
+"""
+import asyncio
+import random
+
+import pytest
+
+from app import partitioning
+from app.partitioning import (
+    PartitionedItemStore,
+    aggregate_items,
+    items_in_price_range,
+    merge_totals,
+)
+from app.records import ItemRecord
+
+
+def make_item(item_id, owner_id, price):
+    return ItemRecord(
+        id=item_id, title="item", description=None, price=price, owner_id=owner_id, created_at=0
+    )
+
+
+def assert_matches(store, reference):
+    """Check the store and its aggregates against a plain dict of records."""
+    assert list(store) == list(reference)
+    assert list(store.values()) == list(reference.values())
+    assert len(store) == len(reference)
+
+    per_owner = {}
+    for item in reference.values():
+        count, total = per_owner.get(item.owner_id, (0, 0.0))
+        per_owner[item.owner_id] = (count + 1, total + item.price)
+
+    merged = merge_totals(store)
+    assert merged.count == len(reference)
+    assert merged.total == pytest.approx(sum(item.price for item in reference.values()))
+    assert merged.per_owner.keys() == per_owner.keys()
+    for owner_id, (count, total) in per_owner.items():
+        assert merged.per_owner[owner_id][0] == count
+        assert merged.per_owner[owner_id][1] == pytest.approx(total)
+        # Items moved between owners may land at the end of their new shard
+        assert sorted(item.id for item in store.items_of(owner_id)) == sorted(
+            item.id for item in reference.values() if item.owner_id == owner_id
+        )
+
+    aggregate = asyncio.run(aggregate_items(store))
+    prices = [item.price for item in reference.values()]
+    assert aggregate.min_price == (min(prices) if prices else None)
+    assert aggregate.max_price == (max(prices) if prices else None)
+
+
+@pytest.mark.parametrize("partitions", [1, 2, 4, 7])
+def test_random_writes_match_plain_dict(partitions):
+    rng = random.Random(partitions)
+    store = PartitionedItemStore(partitions)
+    reference = {}
+    deleted = []
+
+    for step in range(2000):
+        operation = rng.random()
+        if operation < 0.4 or not reference:
+            # Insert, sometimes reusing a deleted ID
+            item_id = deleted.pop() if deleted and rng.random() < 0.3 else len(reference) + len(deleted) + step
+            item = make_item(item_id, rng.randint(1, 20), round(rng.uniform(1, 100), 2))
+            store[item_id] = item
+            reference[item_id] = item
+        elif operation < 0.7:
+            # Update a copy, possibly moving it to another owner and shard
+            item_id = rng.choice(list(reference))
+            item = store[item_id].copy()
+            item.price = round(rng.uniform(1, 100), 2)
+            if rng.random() < 0.2:
+                item.owner_id = rng.randint(1, 20)
+            store[item_id] = item
+            reference[item_id] = item
+        else:
+            item_id = rng.choice(list(reference))
+            del store[item_id]
+            del reference[item_id]
+            deleted.append(item_id)
+
+        if step % 250 == 0:
+            assert_matches(store, reference)
+
+    assert_matches(store, reference)
+
+
+@pytest.mark.parametrize("partitions", [1, 3])
+def test_emptied_store_resets_totals(partitions):
+    store = PartitionedItemStore(partitions)
+    for item_id in range(1, 101):
+        store[item_id] = make_item(item_id, item_id % 5, 0.1 * item_id)
+    for item_id in range(1, 101):
+        del store[item_id]
+
+    assert all(partition.total == 0.0 for partition in store.partitions)
+    assert all(not partition.per_owner for partition in store.partitions)
+    assert_matches(store, {})
+
+
+@pytest.mark.parametrize("partitions", [1, 4])
+def test_items_of_keeps_insertion_order(partitions):
+    store = PartitionedItemStore(partitions)
+    for item_id in range(1, 41):
+        store[item_id] = make_item(item_id, item_id % 3, 1.0)
+    updated = store[4].copy()
+    updated.price = 2.0
+    store[4] = updated
+
+    assert [item.id for item in store.items_of(1)] == list(range(1, 41, 3))
+    assert store[4].price == 2.0
+
+
+def test_missing_items_raise_key_error():
+    store = PartitionedItemStore(2)
+    store[1] = make_item(1, 1, 10.0)
+
+    with pytest.raises(KeyError):
+        store[2]
+    with pytest.raises(KeyError):
+        del store[2]
+    assert 2 not in store
+
+
+def test_price_range_on_worker_pool_matches_in_process(monkeypatch):
+    monkeypatch.setattr(partitioning, "REPORT_WORKERS", 2)
+    store = PartitionedItemStore(3)
+    for item_id in range(1, 301):
+        store[item_id] = make_item(item_id, item_id % 11, float(item_id % 97))
+
+    try:
+        executor = partitioning.get_executor()
+        assert executor is not None
+        parallel = asyncio.run(items_in_price_range(store, 10.0, 20.0, executor, min_parallel_items=0))
+        aggregate = asyncio.run(aggregate_items(store, executor, min_parallel_items=0))
+    finally:
+        partitioning.shutdown_executor()
+
+    monkeypatch.setattr(partitioning, "REPORT_WORKERS", 0)
+    in_process = asyncio.run(items_in_price_range(store, 10.0, 20.0))
+    assert [item.id for item in parallel] == [item.id for item in in_process]
+    assert (aggregate.min_price, aggregate.max_price) == (0.0, 96.0)
+    assert partitioning._executor is None
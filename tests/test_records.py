@@ -0,0 +1,24 @@
+"""
+Tests for the compact storage records
+"""
+from app.records import INTERN_MAX_LENGTH, ItemRecord
+
+
+def make_item(title, description):
+    return ItemRecord(id=1, title=title, description=description, price=1.0, owner_id=1, created_at=0)
+
+
+def test_short_text_is_shared_between_rows():
+    first = make_item("".join(["Desk ", "lamp"]), None)
+    second = make_item("".join(["Desk ", "lamp"]), None)
+
+    assert first.title is second.title
+
+
+def test_long_text_is_not_interned():
+    length = INTERN_MAX_LENGTH + 1
+    first = make_item("Lamp", "".join("x" for _ in range(length)))
+    second = make_item("Lamp", "".join("x" for _ in range(length)))
+
+    assert first.description == second.description
+    assert first.description is not second.description